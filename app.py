@@ -1,11 +1,25 @@
 # app.py
 import os
-from flask import Flask, render_template_string, request
+from flask import Flask, Response, g, make_response, render_template, request
+from flask_caching import Cache
+from flask_compress import Compress
 import folium
-from folium.plugins import MarkerCluster
+from branca.element import MacroElement
+from folium.plugins import FastMarkerCluster
+from jinja2 import Template
 from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
+from geopy.extra.rate_limiter import RateLimiter
+import diskcache
+import gc
+import hashlib
+import json
+import math
+import numpy as np
+import threading
+import time
 import traceback
+from dataclasses import dataclass
+from functools import lru_cache
 
 # Optional CSV support (if you upload a hospitals.csv with real data)
 try:
@@ -13,34 +27,158 @@ try:
 except Exception:
     pd = None
 
+# Optional Numba JIT for the distance kernel, which only runs without the BallTree below; plain NumPy otherwise
+try:
+    from numba import njit
+except Exception:
+    njit = None
+
+# scikit-learn BallTree spatial index (in requirements.txt) for O(log n) nearby queries; bounding box + haversine if missing
+try:
+    from sklearn.neighbors import BallTree
+except Exception:
+    BallTree = None
+
+# Optional Redis (set REDIS_URL) to share the Nominatim rate budget across hosts; workers on one host share it via diskcache
+try:
+    import redis
+except Exception:
+    redis = None
+
 app = Flask(__name__)
+# rendered map HTML is cached per (rounded location, type); set CACHE_TYPE/CACHE_REDIS_URL to share it across workers
+app.config.from_mapping(CACHE_TYPE=os.environ.get("CACHE_TYPE", "SimpleCache"),
+                        CACHE_REDIS_URL=os.environ.get("CACHE_REDIS_URL"),
+                        CACHE_DEFAULT_TIMEOUT=3600)
+cache = Cache(app)
+
+# --- Response compression; compressed bodies of reproducible pages are kept in the same cache ---
+class _CompressedPageCache:
+    # Flask-Compress storage backend; a None key (response not marked cacheable) is never stored.
+    # Flask-Compress calls set() after every get(), hits included; only misses are written, so an
+    # entry still expires CACHE_DEFAULT_TIMEOUT after it was first stored instead of living forever
+    def get(self, key):
+        value = cache.get(key) if key else None
+        g.compressed_page_hit = value is not None
+        return value
+
+    def set(self, key, value):
+        if key and not g.get("compressed_page_hit"):
+            cache.set(key, value)
+
+def page_digest(location, type_name):
+    # hashed, so no character the user types can make two searches share a key or ETag
+    return hashlib.md5(json.dumps([DATA_VERSION, CODE_VERSION, location, type_name]).encode()).hexdigest()
+
+def page_key(location, type_name):
+    return f"page:{page_digest(location, type_name)}"
+
+def _compressed_page_key(req):
+    # index() sets g.page_cache_key only for pages that depend on nothing but the form input
+    key = g.get("page_cache_key")
+    return key and f"{key}:{req.headers.get('Accept-Encoding', '')}"
+
+app.config.from_mapping(COMPRESS_ALGORITHM=["br", "gzip"],
+                        COMPRESS_CACHE_BACKEND=_CompressedPageCache,
+                        COMPRESS_CACHE_KEY=_compressed_page_key)
+Compress(app)
 
 # --- Load hospitals dataset if hospitals.csv exists; otherwise use sample data ---
+# Both paths return columns (name, type, latitude, longitude, doctors, rating), not per-hospital rows
+HOSPITAL_COLUMNS = ["name", "type", "latitude", "longitude", "doctors", "rating"]
+
+HOSPITALS_CSV = "hospitals.csv"
+
 def load_hospitals():
-    csv_path = "hospitals.csv"
+    csv_path = HOSPITALS_CSV
     if pd and os.path.exists(csv_path):
-        df = pd.read_csv(csv_path)
+        df = pd.read_csv(csv_path, dtype={"name": str, "type": str, "latitude": np.float64,
+                                          "longitude": np.float64, "doctors": str, "rating": np.float64})
         # Expect columns: name,type,latitude,longitude,doctors (pipe-separated),rating
-        hospitals = []
-        for _, r in df.iterrows():
-            hospitals.append({
-                "name": str(r.get("name","")).strip(),
-                "type": str(r.get("type","")).strip(),
-                "coords": (float(r.get("latitude")), float(r.get("longitude"))),
-                "doctors": [d.strip() for d in str(r.get("doctors","")).split("|") if d.strip()],
-                "rating": float(r.get("rating") if not pd.isna(r.get("rating")) else 0)
-            })
-        return hospitals
+        df = df.reindex(columns=HOSPITAL_COLUMNS)
+        # a hospital without usable coordinates can't be placed; NaN would also break the BallTree build
+        located = np.isfinite(df["latitude"]) & np.isfinite(df["longitude"])
+        if not located.all():
+            print(f"Skipping {(~located).sum()} hospitals in {csv_path} without latitude/longitude")
+            df = df[located]
+        return {
+            "name": df["name"].fillna("").str.strip().tolist(),
+            "type": df["type"].fillna("").str.strip().tolist(),
+            "latitude": df["latitude"].to_numpy(),
+            "longitude": df["longitude"].to_numpy(),
+            "doctors": [[d.strip() for d in s.split("|") if d.strip()] for s in df["doctors"].fillna("").tolist()],
+            "rating": df["rating"].fillna(0).to_numpy(),
+        }
     # fallback sample data (can be replaced with a full CSV)
-    return [
+    sample = [
         {"name":"AIIMS Delhi","type":"Multispeciality","coords":(28.5672,77.2100),"doctors":["Dr. Sharma","Dr. Rao"],"rating":4.8},
         {"name":"Apollo Hospital Chennai","type":"Multispeciality","coords":(13.0500,80.2500),"doctors":["Dr. Kumar","Dr. Meena"],"rating":4.5},
         {"name":"NIMHANS Bangalore","type":"Psychiatry","coords":(12.9780,77.5910),"doctors":["Dr. Ramesh"],"rating":4.6},
         {"name":"KEM Hospital Mumbai","type":"General","coords":(18.9875,72.8260),"doctors":["Dr. Patil"],"rating":4.4},
         {"name":"Vinayaka Mission Hospital Karaikal","type":"Multispeciality","coords":(10.9094,79.8461),"doctors":["Dr. R.T. Kannapiran"],"rating":4.3},
     ]
+    return {
+        "name": [h["name"] for h in sample],
+        "type": [h["type"] for h in sample],
+        "latitude": [h["coords"][0] for h in sample],
+        "longitude": [h["coords"][1] for h in sample],
+        "doctors": [h["doctors"] for h in sample],
+        "rating": [h["rating"] for h in sample],
+    }
 
-HOSPITALS = load_hospitals()
+# --- Structure-of-arrays hospital table; the request path indexes these, never per-row dicts ---
+EARTH_RADIUS_KM = 6371.0
+
+@dataclass(frozen=True)
+class HospitalTable:
+    """Read-only hospital columns, built once at import.
+
+    Under ``gunicorn --preload`` this happens before the workers fork, so every worker shares
+    the same array buffers copy-on-write; nothing may write to them after load.
+    """
+    name: np.ndarray
+    type: np.ndarray
+    lat_deg: np.ndarray
+    lon_deg: np.ndarray
+    # float32 radians for the distance kernels: half the memory traffic, twice the SIMD lanes,
+    # and ~1 m of error at 200 km, far below the 0.01 km the UI shows
+    lat: np.ndarray
+    lon: np.ndarray
+    rating: np.ndarray
+    doctors: list
+    # doctors joined for display, so map popups need no per-request string work
+    doctors_text: np.ndarray
+
+    @classmethod
+    def from_columns(cls, cols):
+        lat_deg = np.asarray(cols["latitude"], dtype=np.float64)
+        lon_deg = np.asarray(cols["longitude"], dtype=np.float64)
+        table = cls(name=np.array(cols["name"], dtype=object),
+                    type=np.array(cols["type"], dtype=object),
+                    lat_deg=lat_deg,
+                    lon_deg=lon_deg,
+                    lat=np.radians(lat_deg).astype(np.float32),
+                    lon=np.radians(lon_deg).astype(np.float32),
+                    rating=np.asarray(cols["rating"], dtype=np.float32),
+                    doctors=list(cols["doctors"]),
+                    doctors_text=np.array([", ".join(d) for d in cols["doctors"]], dtype=object))
+        for arr in (table.name, table.type, table.lat_deg, table.lon_deg, table.lat, table.lon, table.rating, table.doctors_text):
+            arr.flags.writeable = False
+        return table
+
+HOSPITALS = HospitalTable.from_columns(load_hospitals())
+# part of every page ETag, so clients revalidate after the dataset changes
+DATA_VERSION = str(os.path.getmtime(HOSPITALS_CSV)) if pd and os.path.exists(HOSPITALS_CSV) else "sample"
+# likewise for the code that renders pages (TEMPLATE, the marker JS, build_map) and the folium it runs on
+with open(__file__, "rb") as _source:
+    CODE_VERSION = hashlib.md5(_source.read() + folium.__version__.encode()).hexdigest()[:12]
+# type dropdown options; HOSPITALS never changes after load, so this is built once
+TYPES = sorted(set(HOSPITALS.type) | {"All"})
+
+def hospital_row(i, distance):
+    # template-facing record, built only for the few hospitals actually rendered
+    return {"name": HOSPITALS.name[i], "type": HOSPITALS.type[i], "coords": (HOSPITALS.lat_deg[i], HOSPITALS.lon_deg[i]),
+            "doctors": HOSPITALS.doctors[i], "rating": float(HOSPITALS.rating[i]), "distance": float(distance)}
 
 # --- HTML template (Bootstrap) embedded in Python ---
 TEMPLATE = """
@@ -63,7 +201,7 @@ TEMPLATE = """
 
   <div class="card shadow-sm mb-4">
     <div class="card-body">
-      <form method="POST" class="row g-2">
+      <form method="GET" class="row g-2">
         <div class="col-md-7">
           <input name="location" placeholder="City, locality or landmark (e.g. 'Karaikal Bazaar' or 'Chennai')" class="form-control" value="{{ request_form.location or '' }}" required>
         </div>
@@ -126,15 +264,258 @@ TEMPLATE = """
 </body>
 </html>
 """
+# parsed and compiled once; render_template_string would redo both on every request
+INDEX_TEMPLATE = app.jinja_env.from_string(TEMPLATE)
+
+# --- Geocoding cache: in-memory LRU in front of an on-disk diskcache store (survives restarts) ---
+# diskcache sits on SQLite, so all gunicorn workers can read and write the same directory safely
+GEOCACHE_PATH = os.environ.get("GEOCACHE_PATH", "geocache")
+_geocache = None
+_geocache_lock = threading.Lock()
+
+def _geocache_store():
+    # opened lazily so each worker gets its own SQLite connection after the fork
+    global _geocache
+    with _geocache_lock:
+        if _geocache is None:
+            _geocache = diskcache.Cache(GEOCACHE_PATH)
+        return _geocache
+
+def _geocache_get(key):
+    try:
+        return _geocache_store().get(key)
+    except Exception:
+        # an unreadable cache should never fail the request; fall through to Nominatim
+        print(traceback.format_exc())
+        return None
+
+def _geocache_put(key, value):
+    try:
+        _geocache_store().set(key, value)
+    except Exception:
+        print(traceback.format_exc())
+
+# --- Nominatim client: one shared geolocator (reuses one keep-alive HTTP session), throttled to the 1 req/s usage policy ---
+NOMINATIM_MIN_DELAY = 1.1
+GEOLOCATOR = Nominatim(user_agent="india_hospital_finder", timeout=10)
+_redis = redis.Redis.from_url(os.environ["REDIS_URL"]) if redis and os.environ.get("REDIS_URL") else None
+# a tuple key, so it can never collide with a (string) geocode query in the same store
+_NOMINATIM_SLOT = ("nominatim", "slot")
+
+def _claim_slot():
+    # atomic "set if absent" with expiry: whoever adds the key owns the next slot until it expires
+    if _redis is not None:
+        try:
+            return bool(_redis.set("nominatim:slot", 1, nx=True, px=int(NOMINATIM_MIN_DELAY * 1000)))
+        except Exception:
+            # Redis unavailable: fall back to the shared disk store below
+            print(traceback.format_exc())
+    return _geocache_store().add(_NOMINATIM_SLOT, 1, expire=NOMINATIM_MIN_DELAY)
+
+def _wait_for_global_slot():
+    # one slot per NOMINATIM_MIN_DELAY across all worker processes, not one per worker
+    try:
+        while not _claim_slot():
+            time.sleep(0.05)
+    except Exception:
+        # shared store unusable: fall back to the per-process limiter below
+        print(traceback.format_exc())
+
+def _geocode_throttled(query, **kwargs):
+    _wait_for_global_slot()
+    return GEOLOCATOR.geocode(query, **kwargs)
+
+# errors are re-raised (not swallowed into None) so a transient failure is never cached as "not found"
+geocode = RateLimiter(_geocode_throttled, min_delay_seconds=NOMINATIM_MIN_DELAY, max_retries=2,
+                      error_wait_seconds=5.0, swallow_exceptions=False)
 
 # --- Utilities ---
-def geocode_location(text):
-    geolocator = Nominatim(user_agent="india_hospital_finder", timeout=10)
-    # try raw input first, then "..., India"
-    loc = geolocator.geocode(text)
+def _geocode_nominatim(text):
+    # restrict to India in a single request rather than retrying with "..., India"
+    return geocode(text, country_codes="in")
+
+@lru_cache(maxsize=4096)
+def _geocode_cached(key):
+    hit = _geocache_get(key)
+    if hit:
+        return hit[0], hit[1]
+    loc = _geocode_nominatim(key)
     if not loc:
-        loc = geolocator.geocode(f"{text}, India")
-    return loc
+        return None
+    # stored as (lat, lon, timestamp) so stale entries can be expired later
+    _geocache_put(key, (loc.latitude, loc.longitude, time.time()))
+    return loc.latitude, loc.longitude
+
+def geocode_location(text):
+    # returns (lat, lon) or None; normalized so "Chennai " and "chennai" share one cache entry
+    return _geocode_cached(text.strip().lower())
+
+# hospitals are only considered within this radius of the user (widened when none are found)
+SEARCH_RADIUS_KM = 200.0
+# half the Earth's circumference: a search this wide reaches every hospital
+MAX_SEARCH_RADIUS_KM = np.pi * EARTH_RADIUS_KM
+
+# float32 constants so neither kernel silently upcasts to float64
+_F32_HALF = np.float32(0.5)
+_F32_ONE = np.float32(1.0)
+_F32_DIAMETER_KM = np.float32(2 * EARTH_RADIUS_KM)
+
+if njit is not None:
+    # serial on purpose: Numba's OpenMP/workqueue threading layers are not safe across the
+    # gunicorn --preload fork, and the workers already give us one core each
+    @njit(fastmath=True, cache=True)
+    def _haversine_kernel(lat, lon, lats, lons, out):
+        # same formula as below, fused into one loop with no temporary arrays
+        cos_lat = math.cos(lat)
+        for i in range(lats.size):
+            dlat = lats[i] - lat
+            dlon = lons[i] - lon
+            a = math.sin(dlat * _F32_HALF) ** 2 + cos_lat * math.cos(lats[i]) * math.sin(dlon * _F32_HALF) ** 2
+            a = min(a, _F32_ONE)
+            out[i] = _F32_DIAMETER_KM * math.atan2(math.sqrt(a), math.sqrt(_F32_ONE - a))
+else:
+    _haversine_kernel = None
+
+def haversine_km(lat, lon, lats, lons):
+    # great-circle distance (km) from one point to many; all angles in radians.
+    # atan2(sqrt(a), sqrt(1-a)) rather than arccos/arcsin: well-conditioned for both very close and
+    # near-antipodal points, which is what makes float32 safe here. Rounding can still push a just
+    # past 1 near the antipode, so it is clamped before the sqrt(1-a).
+    lat, lon = np.float32(lat), np.float32(lon)
+    if _haversine_kernel is not None:
+        out = np.empty_like(lats)
+        _haversine_kernel(lat, lon, lats, lons, out)
+        return out
+    dlat = lats - lat
+    dlon = lons - lon
+    a = np.sin(dlat * _F32_HALF) ** 2 + np.cos(lat) * np.cos(lats) * np.sin(dlon * _F32_HALF) ** 2
+    a = np.minimum(a, _F32_ONE)
+    return _F32_DIAMETER_KM * np.arctan2(np.sqrt(a), np.sqrt(_F32_ONE - a))
+
+# --- Map rendering ---
+# above this many hospitals, clustering is skipped and plain circle markers are drawn on the canvas
+CANVAS_MARKER_THRESHOLD = 500
+
+# build one hospital marker in the browser from a data row [lat, lon, name, type, rating, distance, doctors];
+# the popup HTML is assembled client-side so Python does no per-marker string work
+HOSPITAL_POPUP_JS = ("'<b>' + row[2] + '</b><br>' + row[3] + '<br>Rating: ' + row[4].toFixed(1) + '\\u2605"
+                     "<br>Distance: ' + row[5].toFixed(2) + ' km<br>Doctors: ' + row[6]")
+HOSPITAL_MARKER_JS = """function (row) {
+    var marker = L.marker(new L.LatLng(row[0], row[1]));
+    marker.setIcon(L.AwesomeMarkers.icon({icon: "plus", markerColor: "blue", prefix: "glyphicon"}));
+    marker.bindPopup(%s);
+    return marker;
+}""" % HOSPITAL_POPUP_JS
+HOSPITAL_CIRCLE_JS = """function (row) {
+    return L.circleMarker(new L.LatLng(row[0], row[1]), {radius: 5, color: "#0d6efd", fillOpacity: 0.7}).bindPopup(%s);
+}""" % HOSPITAL_POPUP_JS
+
+class MarkerLayer(MacroElement):
+    """Unclustered counterpart of FastMarkerCluster: one feature group filled in the browser by a JS callback."""
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                var callback = {{ this.callback }};
+                var data = {{ this.data|tojson }};
+                var layer = L.featureGroup();
+                for (var i = 0; i < data.length; i++) {
+                    callback(data[i]).addTo(layer);
+                }
+                layer.addTo({{ this._parent.get_name() }});
+                return layer;
+            })();
+        {% endmacro %}""")
+
+    def __init__(self, data, callback):
+        super().__init__()
+        self._name = "MarkerLayer"
+        self.data = data
+        self.callback = callback
+
+def build_map(user_coords, idx, dist, best):
+    # create folium map centered on user
+    # canvas renderer: vector markers share one <canvas> instead of one DOM node each
+    m = folium.Map(location=user_coords, zoom_start=12, control_scale=True, prefer_canvas=True)
+    folium.Marker(user_coords, popup="Your location", icon=folium.Icon(color="red", icon="user")).add_to(m)
+
+    # hospital markers (and their popups) are created in the browser from plain data rows
+    columns = (HOSPITALS.lat_deg[idx].tolist(), HOSPITALS.lon_deg[idx].tolist(),
+               HOSPITALS.name[idx].tolist(), HOSPITALS.type[idx].tolist(),
+               np.round(HOSPITALS.rating[idx].astype(np.float64), 1).tolist(),
+               np.round(dist.astype(np.float64), 2).tolist(),
+               HOSPITALS.doctors_text[idx].tolist())
+    rows = [list(row) for row in zip(*columns)]
+    if len(rows) > CANVAS_MARKER_THRESHOLD:
+        MarkerLayer(rows, HOSPITAL_CIRCLE_JS).add_to(m)
+    else:
+        FastMarkerCluster(data=rows, callback=HOSPITAL_MARKER_JS).add_to(m)
+
+    # include a green star marker for best
+    folium.Marker(best["coords"], popup=f"Best: {best['name']}", icon=folium.Icon(color="green", icon="star")).add_to(m)
+
+    # produce HTML for map (embed)
+    return m._repr_html_()
+
+def nearby_candidates(user_lat, user_lon, radius_km, type_mask=None):
+    # cheap lat/lon bounding-box test before any trig; a superset of the hospitals within radius_km
+    dlat_max = radius_km / 111.0
+    if dlat_max >= 180:
+        # box already spans the globe
+        return np.flatnonzero(type_mask) if type_mask is not None else np.arange(HOSPITALS.type.size)
+    dlon_max = radius_km / (111.0 * max(np.cos(np.radians(user_lat)), 0.01))
+    mask = (np.abs(HOSPITALS.lat_deg - user_lat) < dlat_max) & (np.abs(HOSPITALS.lon_deg - user_lon) < dlon_max)
+    if type_mask is not None:
+        mask &= type_mask
+    return np.flatnonzero(mask)
+
+def matching_etag(etag):
+    # Flask-Compress sends compressed pages tagged "<etag>:<algorithm>"; accept either form.
+    # The tags are weak, so iterating if_none_match (strong tags only) would never see them
+    for tag in request.if_none_match.as_set(include_weak=True):
+        if tag == etag or tag.startswith(etag + ":"):
+            return tag
+    return None
+
+def build_spatial_index():
+    # one haversine BallTree over all hospitals plus one per type, each with the table rows it covers
+    if BallTree is None or HOSPITALS.type.size == 0:
+        return {}
+    points = np.radians(np.column_stack([HOSPITALS.lat_deg, HOSPITALS.lon_deg]))
+    groups = {"All": np.arange(HOSPITALS.type.size)}
+    groups.update((t, np.flatnonzero(HOSPITALS.type == t)) for t in set(HOSPITALS.type))
+    return {t: (BallTree(points[rows], metric="haversine"), rows) for t, rows in groups.items()}
+
+SPATIAL_INDEX = build_spatial_index()
+
+# the kernel only runs when there is no spatial index; then compile it at import rather than on the first request
+if not SPATIAL_INDEX:
+    haversine_km(0.0, 0.0, np.zeros(1, dtype=np.float32), np.zeros(1, dtype=np.float32))
+
+def _within_radius(user_lat, user_lon, type_name, type_mask, radius_km):
+    if type_name in SPATIAL_INDEX:
+        tree, rows = SPATIAL_INDEX[type_name]
+        found, dist_rad = tree.query_radius(np.radians([[user_lat, user_lon]]), r=radius_km / EARTH_RADIUS_KM,
+                                            return_distance=True)
+        return rows[found[0]], (dist_rad[0] * EARTH_RADIUS_KM).astype(np.float32)
+    idx = nearby_candidates(user_lat, user_lon, radius_km, type_mask)
+    # compute distances for the boxed hospitals in one vectorized pass, then drop the box corners
+    dist = haversine_km(np.radians(user_lat), np.radians(user_lon), HOSPITALS.lat[idx], HOSPITALS.lon[idx])
+    if radius_km >= MAX_SEARCH_RADIUS_KM:
+        return idx, dist
+    inside = dist <= radius_km
+    return idx[inside], dist[inside]
+
+def nearby_hospitals(user_lat, user_lon, type_name):
+    # (table indices, distances in km) of hospitals of this type within SEARCH_RADIUS_KM, doubling the
+    # radius until one is found; the BallTree and bounding-box paths apply the same circular cutoff
+    type_mask = None if type_name == "All" or type_name in SPATIAL_INDEX else HOSPITALS.type == type_name
+    radius_km = SEARCH_RADIUS_KM
+    while True:
+        radius_km = min(radius_km, MAX_SEARCH_RADIUS_KM)
+        idx, dist = _within_radius(user_lat, user_lon, type_name, type_mask, radius_km)
+        if idx.size or radius_km == MAX_SEARCH_RADIUS_KM:
+            return idx, dist
+        radius_km *= 2
 
 @app.route("/", methods=["GET", "POST"])
 def index():
@@ -142,67 +523,80 @@ def index():
     map_html = None
     best = None
     results = []
-    types = sorted(list({h["type"] for h in HOSPITALS}) | {"All"})
     request_form = {"location": "", "type": "All"}
-    try:
-        if request.method == "POST":
-            request_form["location"] = request.form.get("location","").strip()
-            request_form["type"] = request.form.get("type","All")
+    # the form searches with GET ?location=...&type=... so browsers can revalidate; POST is still accepted
+    params = request.form if request.method == "POST" else request.args
+    searching = request.method == "POST" or "location" in params
+    if searching:
+        request_form["location"] = params.get("location","").strip()
+        request_form["type"] = params.get("type","All")
 
+    # the page depends only on the form input and the dataset, so a matching ETag skips all the work
+    etag = page_digest(request_form["location"], request_form["type"])
+    if request.method == "GET":
+        matched = matching_etag(etag)
+        if matched:
+            return Response(status=304, headers={"ETag": f'W/"{matched}"'})
+
+    try:
+        if searching:
             if not request_form["location"]:
                 error = "Please enter a location."
             else:
-                loc = geocode_location(request_form["location"])
-                if not loc:
+                user_coords = geocode_location(request_form["location"])
+                if not user_coords:
                     error = "Location not found. Try a different query or be more specific."
                 else:
-                    user_coords = (loc.latitude, loc.longitude)
-
-                    # filter by type
-                    filtered = [dict(h) for h in HOSPITALS if request_form["type"] == "All" or h["type"] == request_form["type"]]
-
-                    # compute distances
-                    for h in filtered:
-                        h["distance"] = geodesic(user_coords, h["coords"]).km
-
-                    if not filtered:
+                    # filter by type (TYPES holds every type present, so this needs no scan)
+                    if HOSPITALS.type.size == 0 or request_form["type"] not in TYPES:
                         error = "No hospitals of that type are available in this dataset."
                     else:
-                        # sort by distance
-                        filtered.sort(key=lambda x: x["distance"])
-                        # create folium map centered on user
-                        m = folium.Map(location=user_coords, zoom_start=12, control_scale=True)
-                        folium.Marker(user_coords, popup="Your location", icon=folium.Icon(color="red", icon="user")).add_to(m)
-
-                        cluster = MarkerCluster()
-                        cluster.add_to(m)
-                        for h in filtered:
-                            popup = f"<b>{h['name']}</b><br>{h['type']}<br>Rating: {h.get('rating',0)}★<br>Distance: {h['distance']:.2f} km<br>Doctors: {', '.join(h.get('doctors',[]))}"
-                            folium.Marker(h["coords"], popup=popup, icon=folium.Icon(color="blue", icon="plus")).add_to(cluster)
+                        idx, dist = nearby_hospitals(user_coords[0], user_coords[1], request_form["type"])
 
                         # pick best hospital by rating then distance
-                        best_sorted = sorted(filtered, key=lambda x: (-x.get("rating",0), x["distance"]))
-                        best = best_sorted[0]
-                        # include a green star marker for best
-                        folium.Marker(best["coords"], popup=f"Best: {best['name']}", icon=folium.Icon(color="green", icon="star")).add_to(m)
+                        # (O(n): nearest among the top-rated, no sort and no per-row lambda)
+                        rating = HOSPITALS.rating[idx]
+                        top_rated = np.flatnonzero(rating == rating.max())
+                        b = top_rated[np.argmin(dist[top_rated])]
+                        best = hospital_row(idx[b], dist[b])
 
-                        # produce HTML for map (embed)
-                        map_html = m._repr_html_()
+                        # 3 decimals is ~110 m, so nearby queries for the same place share one rendered map;
+                        # the versions keep a shared cache from serving maps of an older hospitals.csv or build_map
+                        map_key = f"map:{DATA_VERSION}:{CODE_VERSION}:{round(user_coords[0], 3)}:{round(user_coords[1], 3)}:{request_form['type']}"
+                        map_html = cache.get(map_key)
+                        if map_html is None:
+                            map_html = build_map(user_coords, idx, dist, best)
+                            cache.set(map_key, map_html)
 
-                        # return top 8 results
-                        results = filtered[:8]
+                        # return top 8 results; only the nearest few need ordering, not the whole set
+                        k = min(8, idx.size)
+                        top = np.argpartition(dist, k - 1)[:k]
+                        top = top[np.argsort(dist[top])]
+                        results = [hospital_row(idx[j], dist[j]) for j in top]
+                        g.page_cache_key = page_key(request_form["location"], request_form["type"])
+        else:
+            g.page_cache_key = page_key("", "All")
     except Exception as e:
         error = "Server error: " + str(e)
         # log stack trace to server logs
         print(traceback.format_exc())
 
-    return render_template_string(TEMPLATE,
-                                  error=error,
-                                  map_html=map_html,
-                                  best=best,
-                                  results=results,
-                                  types=types,
-                                  request_form=request_form)
+    response = make_response(render_template(INDEX_TEMPLATE,
+                                             error=error,
+                                             map_html=map_html,
+                                             best=best,
+                                             results=results,
+                                             types=TYPES,
+                                             request_form=request_form))
+    # only reproducible pages get a validator (errors may be transient); browsers never revalidate POSTs.
+    # Weak, since folium gives every render fresh element ids: equivalent pages, not identical bytes
+    if request.method == "GET" and g.get("page_cache_key"):
+        response.set_etag(etag, weak=True)
+    return response
+
+# Objects created during import (the hospital table above all) are moved out of the collector's
+# reach, so GC passes in forked gunicorn workers don't dirty their shared pages
+gc.freeze()
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
@@ -0,0 +1,161 @@
+# test_app.py
+from types import SimpleNamespace
+
+import diskcache
+import numpy as np
+import pytest
+
+import app
+
+CITIES = {
+    "Delhi": (28.61, 77.21),
+    "Mumbai": (19.08, 72.88),
+    "Chennai": (13.08, 80.27),
+    "Kolkata": (22.57, 88.36),
+    "Bangalore": (12.97, 77.59),
+}
+TYPES = ["General", "Psychiatry", "Multispeciality"]
+
+@pytest.fixture
+def synthetic_hospitals(monkeypatch):
+    pytest.importorskip("sklearn")
+    # 3000 hospitals scattered up to ~300 km around each city, so the 200 km cutoff and box corners matter
+    rng = np.random.default_rng(0)
+    n = 3000
+    centres = np.array(list(CITIES.values()))[rng.integers(len(CITIES), size=n)]
+    cols = {
+        "name": [f"H{i}" for i in range(n)],
+        "type": rng.choice(TYPES, n).tolist(),
+        "latitude": centres[:, 0] + rng.uniform(-2.7, 2.7, n),
+        "longitude": centres[:, 1] + rng.uniform(-2.7, 2.7, n),
+        "doctors": [[] for _ in range(n)],
+        "rating": rng.uniform(3, 5, n).round(1),
+    }
+    monkeypatch.setattr(app, "HOSPITALS", app.HospitalTable.from_columns(cols))
+    monkeypatch.setattr(app, "SPATIAL_INDEX", app.build_spatial_index())
+
+@pytest.mark.parametrize("city", sorted(CITIES))
+@pytest.mark.parametrize("type_name", ["All"] + TYPES)
+def test_balltree_and_bbox_paths_agree(synthetic_hospitals, monkeypatch, city, type_name):
+    lat, lon = CITIES[city]
+    tree_idx, tree_dist = app.nearby_hospitals(lat, lon, type_name)
+    monkeypatch.setattr(app, "SPATIAL_INDEX", {})
+    bbox_idx, bbox_dist = app.nearby_hospitals(lat, lon, type_name)
+
+    assert tree_idx.size
+    assert tree_dist.max() <= app.SEARCH_RADIUS_KM
+    np.testing.assert_array_equal(np.sort(tree_idx), np.sort(bbox_idx))
+    np.testing.assert_allclose(tree_dist[np.argsort(tree_idx)], bbox_dist[np.argsort(bbox_idx)], atol=0.01)
+
+@pytest.mark.parametrize("type_name", ["All", "Psychiatry"])
+def test_paths_agree_when_search_widens(synthetic_hospitals, monkeypatch, type_name):
+    # nothing within 200 km of the southern Indian Ocean; both paths must widen to the same ring
+    tree_idx, _ = app.nearby_hospitals(-30.0, 80.0, type_name)
+    monkeypatch.setattr(app, "SPATIAL_INDEX", {})
+    bbox_idx, _ = app.nearby_hospitals(-30.0, 80.0, type_name)
+
+    assert tree_idx.size
+    np.testing.assert_array_equal(np.sort(tree_idx), np.sort(bbox_idx))
+
+@pytest.mark.parametrize("jit", [True, False])
+def test_haversine_has_no_nan_near_antipodes(monkeypatch, jit):
+    if not jit:
+        monkeypatch.setattr(app, "_haversine_kernel", None)
+    rng = np.random.default_rng(0)
+    lat, lon = np.radians(13.08), np.radians(80.27)
+    # points within a few metres of the antipode, where float32 rounding can push a past 1
+    lats = (-lat + rng.uniform(-1e-4, 1e-4, 100_000)).astype(np.float32)
+    lons = (lon - np.pi + rng.uniform(-1e-4, 1e-4, 100_000)).astype(np.float32)
+    dist = app.haversine_km(lat, lon, lats, lons)
+    assert not np.isnan(dist).any()
+    assert dist.max() <= app.MAX_SEARCH_RADIUS_KM + 1
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    # Nominatim is faked (only queries naming Chennai resolve) and every cache starts empty
+    queries = []
+    def fake_nominatim(text):
+        queries.append(text)
+        return SimpleNamespace(latitude=13.08, longitude=80.27) if "chennai" in text else None
+    monkeypatch.setattr(app, "_geocode_nominatim", fake_nominatim)
+    store = diskcache.Cache(str(tmp_path))
+    monkeypatch.setattr(app, "_geocache_store", lambda: store)
+    app._geocode_cached.cache_clear()
+    app.cache.clear()
+    client = app.app.test_client()
+    client.queries = queries
+    yield client
+    app._geocode_cached.cache_clear()
+    store.close()
+
+def test_geocode_key_is_normalised(client):
+    assert app.geocode_location(" Chennai ") == (13.08, 80.27)
+    assert app.geocode_location("CHENNAI") == (13.08, 80.27)
+    app._geocode_cached.cache_clear()
+    # the disk store answers once the in-memory LRU is gone
+    assert app.geocode_location("chennai") == (13.08, 80.27)
+    assert client.queries == ["chennai"]
+
+@pytest.mark.parametrize("encoding", ["identity", "br", "gzip"])
+def test_conditional_get_returns_304(client, encoding):
+    url = "/?location=Chennai&type=All"
+    first = client.get(url, headers={"Accept-Encoding": encoding})
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+    assert etag.startswith('W/"')
+    if encoding != "identity":
+        assert etag.endswith(f':{encoding}"')
+
+    again = client.get(url, headers={"Accept-Encoding": encoding, "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == etag
+
+def test_etag_changes_with_data_and_code(client, monkeypatch):
+    etag = client.get("/?location=Chennai").headers["ETag"]
+    monkeypatch.setattr(app, "CODE_VERSION", "next")
+    assert client.get("/?location=Chennai", headers={"If-None-Match": etag}).status_code == 200
+    monkeypatch.setattr(app, "DATA_VERSION", "next")
+    assert client.get("/?location=Chennai").headers["ETag"] != etag
+
+def test_no_etag_on_error_pages_or_posts(client):
+    assert "ETag" not in client.get("/?location=nowhere").headers
+    assert "ETag" not in client.get("/?location=").headers
+    assert "ETag" not in client.get("/?location=Chennai&type=Nope").headers
+    assert "ETag" not in client.post("/", data={"location": "Chennai", "type": "All"}).headers
+
+def test_compressed_pages_keyed_by_search_and_encoding(client, monkeypatch):
+    writes = []
+    cache_set = app.cache.set
+    monkeypatch.setattr(app.cache, "set", lambda key, value, *a, **kw: (writes.append(key), cache_set(key, value, *a, **kw)))
+
+    for _ in range(3):
+        client.get("/?location=Chennai&type=All", headers={"Accept-Encoding": "br"})
+    client.get("/?location=Chennai&type=All", headers={"Accept-Encoding": "gzip"})
+    # a colon in the location must not land on another search's key
+    client.get("/?location=Chennai:All&type=All", headers={"Accept-Encoding": "br"})
+    client.get("/?location=nowhere&type=All", headers={"Accept-Encoding": "br"})
+
+    key = app.page_key("Chennai", "All")
+    other = app.page_key("Chennai:All", "All")
+    pages = [k for k in writes if k.startswith("page:")]
+    # stored once per search and encoding, never rewritten on a hit, never for an error page
+    assert pages == [f"{key}:br", f"{key}:gzip", f"{other}:br"]
+    assert other != key
+
+def test_rows_without_coordinates_are_dropped(monkeypatch, tmp_path):
+    pytest.importorskip("pandas")
+    csv = tmp_path / "hospitals.csv"
+    csv.write_text("name,type,latitude,longitude,doctors,rating\n"
+                   "A,General,13.05,80.25,Dr. X,4.5\n"
+                   "B,General,,80.25,,4.0\n"
+                   "C,Psychiatry,12.97,,,4.1\n"
+                   "D,Psychiatry,12.98,77.59,Dr. Y|Dr. Z,4.6\n")
+    monkeypatch.setattr(app, "HOSPITALS_CSV", str(csv))
+    monkeypatch.setattr(app, "HOSPITALS", app.HospitalTable.from_columns(app.load_hospitals()))
+
+    assert list(app.HOSPITALS.name) == ["A", "D"]
+    assert app.HOSPITALS.doctors == [["Dr. X"], ["Dr. Y", "Dr. Z"]]
+    monkeypatch.setattr(app, "SPATIAL_INDEX", app.build_spatial_index())
+    idx, _ = app.nearby_hospitals(13.08, 80.27, "All")
+    assert list(app.HOSPITALS.name[idx]) == ["A"]